@@ -0,0 +1,104 @@
+from typing import Dict, FrozenSet, List, Tuple
+
+# Cell values used in the flat occupancy array
+FLOOR = 0
+WALL = 1
+BOX = 2
+
+# Direction letters as used in LURD solution strings
+DIRECTIONS = {
+    'L': (-1, 0),
+    'R': (1, 0),
+    'U': (0, -1),
+    'D': (0, 1),
+}
+
+
+class Board:
+    """
+    Compact, flat representation of a level.
+
+    The level is padded with a one-cell wall border and stored row-major in
+    bytearrays, so a cell is a single int index and a step in any direction
+    is a fixed offset. Out-of-bounds cells therefore never need a bounds check.
+    """
+
+    def __init__(self, level_matrix: List[str]):
+        rows = [''.join(row) for row in level_matrix]
+        self.rows = len(rows)
+        self.cols = max((len(row) for row in rows), default=0)
+        self.width = self.cols + 2
+        self.height = self.rows + 2
+
+        size = self.width * self.height
+        self.walls = bytearray([WALL]) * size
+        self.goals = bytearray(size)
+        boxes = []
+        player = None
+
+        for y, row in enumerate(rows):
+            for x, cell in enumerate(row):
+                i = self.index(x, y)
+                if cell != '#':
+                    self.walls[i] = FLOOR
+                if cell in ['.', '*', '+']:
+                    self.goals[i] = 1
+                if cell in ['$', '*']:
+                    boxes.append(i)
+                elif cell in ['@', '+']:
+                    player = i
+
+        if player is None:
+            raise ValueError("ERROR: Worker not found in the matrix")
+
+        self.initial_boxes: FrozenSet[int] = frozenset(boxes)
+        self.initial_player: int = player
+        self.goal_cells: FrozenSet[int] = frozenset(i for i in range(size) if self.goals[i])
+
+        # Offsets for both upper- and lowercase LURD letters
+        self.offsets: Dict[str, int] = {}
+        for letter, (dx, dy) in DIRECTIONS.items():
+            offset = dy * self.width + dx
+            self.offsets[letter] = offset
+            self.offsets[letter.lower()] = offset
+
+        w = self.width
+        self.neighbour_offsets: Tuple[int, ...] = (-1, 1, -w, w)
+        # The eight surrounding cells in ring order, orthogonal ones at even positions
+        self.ring_offsets: Tuple[int, ...] = (-w, -w + 1, 1, w + 1, w, w - 1, -1, -w - 1)
+
+    def index(self, x: int, y: int) -> int:
+        return (y + 1) * self.width + (x + 1)
+
+    def coords(self, i: int) -> Tuple[int, int]:
+        y, x = divmod(i, self.width)
+        return x - 1, y - 1
+
+    def occupancy(self, boxes) -> bytearray:
+        """
+        Returns a fresh occupancy array: WALL, BOX or FLOOR for every cell.
+        """
+        cells = bytearray(self.walls)
+        for box in boxes:
+            cells[box] = BOX
+        return cells
+
+    def to_matrix(self, boxes, player: int) -> List[List[str]]:
+        """
+        Converts a box set and player cell back into the matrix format used by `Game`.
+        """
+        matrix = []
+        for y in range(self.rows):
+            row = []
+            for x in range(self.cols):
+                i = self.index(x, y)
+                if self.walls[i]:
+                    row.append('#')
+                elif i in boxes:
+                    row.append('*' if self.goals[i] else '$')
+                elif i == player:
+                    row.append('+' if self.goals[i] else '@')
+                else:
+                    row.append('.' if self.goals[i] else ' ')
+            matrix.append(row)
+        return matrix
@@ -0,0 +1,98 @@
+from typing import List
+
+from board import Board
+from reachability import PlayerReachability
+
+
+class HashedVisitedSet:
+    """
+    Visited set that stores a single hash integer per state instead of the full key.
+
+    Two distinct states only collide if their 64-bit hashes match, which is
+    negligible for the state counts these solvers reach.
+    """
+
+    def __init__(self):
+        self._hashes = set()
+
+    def add(self, key) -> bool:
+        """
+        Adds `key` and returns True if it was not seen before.
+        """
+        h = hash(key)
+        if h in self._hashes:
+            return False
+        self._hashes.add(h)
+        return True
+
+    def __contains__(self, key) -> bool:
+        return hash(key) in self._hashes
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+
+class StateCanonicalizer:
+    """
+    Maps equivalent states onto one key.
+
+    Two states are equivalent when they have the same boxes and the player can walk
+    between their positions, or when a symmetry of the board (walls and goals) maps
+    one onto the other.
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.symmetries = self._detect_symmetries()
+
+    def _detect_symmetries(self) -> List[List[int]]:
+        """
+        Returns the cell maps of the rotations and reflections that leave the board unchanged.
+        The identity is always first.
+        """
+        board = self.board
+        rows, cols = board.rows, board.cols
+        transforms = [
+            lambda x, y: (x, y),
+            lambda x, y: (cols - 1 - x, y),
+            lambda x, y: (x, rows - 1 - y),
+            lambda x, y: (cols - 1 - x, rows - 1 - y),
+        ]
+        if rows == cols:
+            transforms += [
+                lambda x, y: (y, x),
+                lambda x, y: (rows - 1 - y, x),
+                lambda x, y: (y, cols - 1 - x),
+                lambda x, y: (rows - 1 - y, cols - 1 - x),
+            ]
+
+        symmetries = []
+        size = board.width * board.height
+        for transform in transforms:
+            mapping = list(range(size))
+            preserved = True
+            for y in range(rows):
+                for x in range(cols):
+                    i = board.index(x, y)
+                    j = board.index(*transform(x, y))
+                    if board.walls[i] != board.walls[j] or board.goals[i] != board.goals[j]:
+                        preserved = False
+                        break
+                    mapping[i] = j
+                if not preserved:
+                    break
+            if preserved:
+                symmetries.append(mapping)
+        return symmetries
+
+    def key(self, reach: PlayerReachability):
+        """
+        Returns the canonical key of a state: the smallest of its symmetric images.
+        """
+        best = (tuple(sorted(reach.boxes)), reach.normalized_player)
+        for mapping in self.symmetries[1:]:
+            image = (tuple(sorted(mapping[box] for box in reach.boxes)),
+                     min(mapping[cell] for cell in reach.region))
+            if image < best:
+                best = image
+        return best
@@ -0,0 +1,156 @@
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from board import BOX, FLOOR, DIRECTIONS
+from deadlock import DeadlockDetector
+from reachability import PlayerReachability
+
+# States explored by the dead-corral sub-search before giving up
+CORRAL_SEARCH_LIMIT = 200
+
+
+class Corral:
+    """
+    An area the player cannot enter, together with the boxes that touch it.
+    """
+
+    def __init__(self, area: FrozenSet[int], boxes: FrozenSet[int], pushes: List[Tuple[int, str]]):
+        self.area = area
+        self.boxes = boxes
+        self.pushes = pushes  # Pushes of the corral's boxes into its area
+
+
+class CorralDetector:
+    """
+    Finds PI-corrals and proves corrals dead.
+
+    A corral is a PI-corral when none of its boxes can be pushed out of it before
+    the player gets in (I), and the player can reach every push of those boxes into
+    it right now (P).
+    While such a corral is unsolved, one of these pushes has to happen eventually, so
+    the search may consider only them.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        # Sub-search results keyed on the corral's area and boxes, and the player's area
+        self._dead: Dict[Tuple[FrozenSet[int], FrozenSet[int], int], bool] = {}
+
+    def find_pi_corral(self, reach: PlayerReachability, inherited: Optional[Corral] = None) -> Optional[Corral]:
+        """
+        Returns an unsolved PI-corral, or None.
+
+        A flooded state is scanned whole for the PI-corral with the fewest pushes.
+        After a locally repaired push, only the area could change next to the cell the
+        box moved to, so just the corrals touching it are checked, along with the
+        parent's PI-corral `inherited` if the push left it alone.
+        """
+        board = self.board
+        cells = reach.cells
+        target = reach.pushed_to
+        if target is None:
+            starts = range(len(cells))
+        else:
+            starts = [target + offset for offset in board.neighbour_offsets]
+        best = None
+
+        seen = set()
+        for start in starts:
+            if cells[start] != FLOOR or start in seen or reach.in_region(start):
+                continue
+            area = self._area(cells, start)
+            seen |= area
+            corral = self._pi_corral(reach, frozenset(area))
+            if corral is not None and (best is None or len(corral.pushes) < len(best.pushes)):
+                best = corral
+
+        # The parent's corral keeps its area and boxes unless the push touched them
+        if (target is not None and inherited is not None and reach.player not in inherited.boxes
+                and target not in inherited.area
+                and not any(target + offset in inherited.area for offset in board.neighbour_offsets)):
+            corral = self._pi_corral(reach, inherited.area)
+            if corral is not None and (best is None or len(corral.pushes) < len(best.pushes)):
+                best = corral
+        return best
+
+    def _pi_corral(self, reach: PlayerReachability, area: FrozenSet[int]) -> Optional[Corral]:
+        """
+        Returns the corral on `area` if it is an unsolved PI-corral, else None.
+        """
+        board = self.board
+        cells = reach.cells
+        offsets = board.offsets
+        boxes = frozenset(cell + offset for cell in area for offset in board.neighbour_offsets
+                          if cells[cell + offset] == BOX)
+        if not boxes:
+            return None
+        # A solved corral never has to be touched again
+        if all(board.goals[box] for box in boxes) and not any(board.goals[cell] for cell in area):
+            return None
+
+        pushes = []
+        for box in boxes:
+            for direction in DIRECTIONS:
+                offset = offsets[direction]
+                target, stand = box + offset, box - offset
+                if target in area:
+                    # P: every push into the corral must be available now
+                    if board.walls[stand]:
+                        continue
+                    if not reach.in_region(stand):
+                        return None
+                    pushes.append((box, direction))
+                elif not (board.walls[target] or board.walls[stand] or target in boxes or stand in area):
+                    # I: no corral box may ever be pushed out before the corral is entered
+                    return None
+        return Corral(area, boxes, pushes)
+
+    def _area(self, cells: bytearray, start: int) -> set:
+        area = {start}
+        stack = [start]
+        while stack:
+            current = stack.pop()
+            for offset in self.board.neighbour_offsets:
+                neighbour = current + offset
+                if cells[neighbour] == FLOOR and neighbour not in area:
+                    area.add(neighbour)
+                    stack.append(neighbour)
+        return area
+
+    def is_dead(self, reach: PlayerReachability, corral: Corral) -> bool:
+        """
+        Runs a bounded search with only the corral's boxes on the board.
+
+        The corral is alive once its boxes are all on goals or the player gets into
+        its area. Any real solution does one of these, so a search that exhausts
+        without either proves the corral dead; hitting the limit counts as alive.
+        """
+        key = (corral.area, corral.boxes, reach.normalized_player)
+        if key in self._dead:
+            return self._dead[key]
+
+        board = self.board
+        start = PlayerReachability(board, corral.boxes, reach.player)
+        frontier = [start]
+        visited = {(start.boxes, start.normalized_player)}
+        dead = True
+
+        while frontier and dead:
+            current = frontier.pop()
+            if current.boxes <= board.goal_cells or not current.region.isdisjoint(corral.area):
+                dead = False
+                break
+            if len(visited) > CORRAL_SEARCH_LIMIT:
+                dead = False
+                break
+            for box, direction in current.reachable_pushes():
+                target = box + board.offsets[direction]
+                if DeadlockDetector.is_corner_box(board, target):
+                    continue
+                child = current.after_push(box, direction)
+                child_key = (child.boxes, child.normalized_player)
+                if child_key not in visited:
+                    visited.add(child_key)
+                    frontier.append(child)
+
+        self._dead[key] = dead
+        return dead
@@ -80,6 +80,18 @@ class DeadlockDetector:
 
         return False
 
+    @staticmethod
+    def is_corner_box(board, box) -> bool:
+        """
+        Compact-board version of the corner check, for a single box cell on a `Board`.
+        """
+        if board.goals[box]:
+            return False
+        walls = board.walls
+        vertical = walls[box - board.width] or walls[box + board.width]
+        horizontal = walls[box - 1] or walls[box + 1]
+        return bool(vertical and horizontal)
+
     @staticmethod
     def is_trapped_along_wall(matrix, x, y) -> bool:
         """
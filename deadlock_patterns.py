@@ -0,0 +1,381 @@
+import json
+import os
+import tempfile
+from collections import deque
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from board import Board, BOX, FLOOR, WALL
+
+DEFAULT_PATTERN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deadlock_patterns.json')
+
+# Local sub-search settings
+MAX_CLUSTER_BOXES = 3     # Boxes taken around the pushed box
+WINDOW_MARGIN = 1         # Cells kept around the cluster's bounding box
+SUB_SEARCH_LIMIT = 150    # States explored before giving up on a proof
+
+# Cell value for the open area around a sub-search window
+OUTSIDE = 3
+
+# The eight cells around a box, in the same order as `Board.ring_offsets`
+RING = [(0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1)]
+
+# The eight rotations and reflections of a relative (dx, dy) offset
+TRANSFORMS = [
+    lambda dx, dy: (dx, dy),
+    lambda dx, dy: (-dx, dy),
+    lambda dx, dy: (dx, -dy),
+    lambda dx, dy: (-dx, -dy),
+    lambda dx, dy: (dy, dx),
+    lambda dx, dy: (-dy, dx),
+    lambda dx, dy: (dy, -dx),
+    lambda dx, dy: (-dy, -dx),
+]
+
+Offsets = FrozenSet[Tuple[int, int]]
+Pattern = Tuple[Offsets, Offsets, Offsets]  # (boxes, walls, non-goal cells)
+
+
+class DeadlockPatternDatabase:
+    """
+    Learned deadlock patterns, persisted between runs.
+
+    A pattern is a small set of boxes together with the walls and non-goal floor
+    cells around them, all as (dx, dy) offsets. It was proven dead by a sub-search
+    that keeps only those boxes and lets anything leaving the local window escape,
+    so the pattern stays dead wherever it appears: in other positions, mirrored or
+    rotated, on other levels, and with extra walls or boxes around it.
+    """
+
+    def __init__(self, filename: Optional[str] = DEFAULT_PATTERN_FILE):
+        self.filename = filename
+        self.patterns: Set[Pattern] = set()
+        # Patterns by anchor box, keyed on the boxes they need around the anchor
+        self._index: Dict[int, List[Tuple[int, Pattern, Tuple[int, int, int, int]]]] = {}
+        # The same index with offsets flattened for one board width
+        self._flat: Dict[int, Dict[int, list]] = {}
+        # Window layouts that a sub-search failed to prove dead
+        self._alive: Set[str] = set()
+        self._dirty = False
+        if filename and os.path.exists(filename):
+            self.load()
+
+    def load(self):
+        """
+        Adds the patterns stored on disk. An unreadable file is reported and skipped.
+        """
+        try:
+            with open(self.filename, 'r') as file:
+                data = json.load(file)
+            patterns = [tuple(frozenset(tuple(offset) for offset in entry[part])
+                              for part in ("boxes", "walls", "non_goals"))
+                        for entry in data.get("patterns", [])]
+            for pattern in patterns:
+                self._add(pattern)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Ignoring unreadable deadlock pattern file {self.filename}: {e}")
+
+    def save(self):
+        """
+        Writes the patterns to disk, keeping any that other runs saved in the meantime.
+        The file is replaced atomically, so readers never see a partial write.
+        """
+        if not self.filename or not self._dirty:
+            return
+        if os.path.exists(self.filename):
+            self.load()
+
+        data = {"patterns": [
+            {part: sorted(offsets) for part, offsets in zip(("boxes", "walls", "non_goals"), pattern)}
+            for pattern in sorted(self.patterns, key=lambda p: [sorted(offsets) for offsets in p])
+        ]}
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, temp_name = tempfile.mkstemp(prefix='.deadlock_patterns-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(data, file)
+            os.replace(temp_name, self.filename)
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _add(self, pattern: Pattern) -> bool:
+        """
+        Stores `pattern` in canonical orientation and indexes all of its orientations.
+        """
+        variants = []
+        for transform in TRANSFORMS:
+            boxes, walls, non_goals = (frozenset(transform(dx, dy) for dx, dy in offsets) for offsets in pattern)
+            # Re-anchor on the first box in reading order
+            ax, ay = min(boxes, key=lambda offset: (offset[1], offset[0]))
+            variants.append(tuple(frozenset((dx - ax, dy - ay) for dx, dy in offsets)
+                                  for offsets in (boxes, walls, non_goals)))
+
+        canonical = min(variants, key=lambda p: [sorted(offsets) for offsets in p])
+        if canonical in self.patterns:
+            return False
+        self.patterns.add(canonical)
+
+        for variant in set(variants):
+            boxes, walls, non_goals = variant
+            for ax, ay in boxes:
+                shifted = tuple(frozenset((dx - ax, dy - ay) for dx, dy in offsets) for offsets in variant)
+                cells = shifted[0] | shifted[1] | shifted[2]
+                bounds = (min(dx for dx, _ in cells), max(dx for dx, _ in cells),
+                          min(dy for _, dy in cells), max(dy for _, dy in cells))
+                box_mask = sum(1 << bit for bit, offset in enumerate(RING) if offset in shifted[0])
+                wall_mask = sum(1 << bit for bit, offset in enumerate(RING) if offset in shifted[1])
+                self._index.setdefault(box_mask, []).append((wall_mask, shifted, bounds))
+        self._flat.clear()
+        return True
+
+    def _flat_index(self, width: int) -> Dict[int, list]:
+        flat = self._flat.get(width)
+        if flat is None:
+            flat = {
+                box_mask: [(wall_mask, bounds, tuple(tuple(dy * width + dx for dx, dy in offsets) for offsets in pattern))
+                           for wall_mask, pattern, bounds in entries]
+                for box_mask, entries in self._index.items()
+            }
+            self._flat[width] = flat
+        return flat
+
+    def matches(self, board: Board, cells: bytearray, box: int) -> bool:
+        """
+        Checks whether a stored pattern covers the box at `box`.
+        """
+        w = board.width
+        walls = board.walls
+        goals = board.goals
+
+        box_mask = 0
+        wall_mask = 0
+        for bit, offset in enumerate(board.ring_offsets):
+            content = cells[box + offset]
+            if content == BOX:
+                box_mask |= 1 << bit
+            elif content == WALL:
+                wall_mask |= 1 << bit
+        if not box_mask:
+            # Every pattern has another box next to each of its boxes
+            return False
+
+        x, y = box % w, box // w
+        index = self._flat_index(w)
+        # Visit every bucket whose required neighbouring boxes are all present
+        submask = box_mask
+        while submask:
+            for required_walls, (min_dx, max_dx, min_dy, max_dy), (boxes, pattern_walls, non_goals) in index.get(submask, ()):
+                if required_walls & ~wall_mask:
+                    continue
+                if x + min_dx < 0 or x + max_dx >= w or y + min_dy < 0 or y + max_dy >= board.height:
+                    continue
+                if (all(cells[box + offset] == BOX for offset in boxes)
+                        and all(walls[box + offset] for offset in pattern_walls)
+                        and not any(goals[box + offset] for offset in non_goals)):
+                    return True
+            submask = (submask - 1) & box_mask
+        return False
+
+    def is_deadlock(self, board: Board, cells: bytearray, box: int) -> bool:
+        """
+        Checks the box just pushed to `box` against the database, and tries to
+        prove its cluster dead with a bounded sub-search when no pattern matches.
+        """
+        if self.matches(board, cells, box):
+            return True
+
+        # Only a box that can no longer move along either axis is worth a proof attempt
+        w = board.width
+        if not (cells[box - 1] or cells[box + 1]) or not (cells[box - w] or cells[box + w]):
+            return False
+
+        cluster = self._cluster(board, cells, box)
+        if len(cluster) < 2:
+            # Single boxes are left to the corner check
+            return False
+
+        window = _Window(board, cluster)
+        if window.key in self._alive:
+            return False
+        if window.prove_dead():
+            self._dirty = self._add(window.pattern()) or self._dirty
+            return True
+        self._alive.add(window.key)
+        return False
+
+    @staticmethod
+    def _cluster(board: Board, cells: bytearray, box: int) -> List[int]:
+        """
+        Collects up to MAX_CLUSTER_BOXES boxes touching `box`, diagonals included.
+        """
+        cluster = [box]
+        seen = {box}
+        queue = deque([box])
+        while queue and len(cluster) < MAX_CLUSTER_BOXES:
+            current = queue.popleft()
+            for offset in board.ring_offsets:
+                neighbour = current + offset
+                if cells[neighbour] == BOX and neighbour not in seen:
+                    seen.add(neighbour)
+                    cluster.append(neighbour)
+                    queue.append(neighbour)
+                    if len(cluster) == MAX_CLUSTER_BOXES:
+                        break
+        return cluster
+
+
+class _Window:
+    """
+    A relaxed copy of the board around a box cluster.
+
+    Only the cluster's boxes are kept. The floor just outside the window is one
+    open area: the player can walk through it freely and a box pushed into it
+    counts as escaped. Any real solution is also a solution here, so failing to
+    solve the window proves the cluster dead.
+    """
+
+    def __init__(self, board: Board, cluster: List[int]):
+        self.board = board
+        self.cluster = cluster
+        self.anchor = cluster[0]
+
+        xs = [box % board.width for box in cluster]
+        ys = [box // board.width for box in cluster]
+        self.x0 = max(min(xs) - WINDOW_MARGIN, 0)
+        self.y0 = max(min(ys) - WINDOW_MARGIN, 0)
+        x1 = min(max(xs) + WINDOW_MARGIN, board.width - 1)
+        y1 = min(max(ys) + WINDOW_MARGIN, board.height - 1)
+
+        # Local grid: the window plus a one-cell ring standing for everything outside it
+        self.width = x1 - self.x0 + 3
+        self.height = y1 - self.y0 + 3
+        self.cells = bytearray(self.width * self.height)
+        self.goals = bytearray(self.width * self.height)
+        for ly in range(self.height):
+            for lx in range(self.width):
+                i = ly * self.width + lx
+                bx, by = self.x0 - 1 + lx, self.y0 - 1 + ly
+                if not (0 <= bx < board.width and 0 <= by < board.height):
+                    self.cells[i] = WALL
+                    continue
+                j = by * board.width + bx
+                on_ring = lx in (0, self.width - 1) or ly in (0, self.height - 1)
+                if board.walls[j]:
+                    self.cells[i] = WALL
+                elif on_ring:
+                    self.cells[i] = OUTSIDE
+                else:
+                    self.goals[i] = board.goals[j]
+
+        self.boxes = frozenset(self._local(box) for box in cluster)
+        self.outside = [i for i, cell in enumerate(self.cells) if cell == OUTSIDE]
+        self.offsets = (-1, 1, -self.width, self.width)
+        # Non-wall neighbours of every cell, so floods skip the bounds and wall checks
+        self.neighbours = [[i + offset for offset in self.offsets
+                            if 0 <= i + offset < len(self.cells) and self.cells[i + offset] != WALL]
+                           for i in range(len(self.cells))]
+
+        layout = []
+        for i, cell in enumerate(self.cells):
+            if cell == WALL:
+                layout.append('#')
+            elif cell == OUTSIDE:
+                layout.append('~')
+            elif i in self.boxes:
+                layout.append('*' if self.goals[i] else '$')
+            else:
+                layout.append('.' if self.goals[i] else ' ')
+        self.key = f"{self.width}:" + ''.join(layout)
+
+    def _local(self, i: int) -> int:
+        x, y = i % self.board.width, i // self.board.width
+        return (y - self.y0 + 1) * self.width + (x - self.x0 + 1)
+
+    def _region(self, boxes, start: int) -> Set[int]:
+        cells = self.cells
+        neighbours = self.neighbours
+        region = {start}
+        stack = [start]
+        outside_added = False
+        while stack:
+            current = stack.pop()
+            if cells[current] == OUTSIDE and not outside_added:
+                # All of the outside is one open area
+                outside_added = True
+                for cell in self.outside:
+                    if cell not in region:
+                        region.add(cell)
+                        stack.append(cell)
+            for neighbour in neighbours[current]:
+                if neighbour not in boxes and neighbour not in region:
+                    region.add(neighbour)
+                    stack.append(neighbour)
+        return region
+
+    def prove_dead(self) -> bool:
+        """
+        Returns True if no reachable state of the window has every remaining box on a goal.
+        Gives up (returning False) after SUB_SEARCH_LIMIT states.
+        """
+        cells = self.cells
+        # Depth-first, since a window that is not dead is usually solved quickly
+        stack = []
+        visited = set()
+
+        # The real player could be in any open area, so start from each of them
+        covered: Set[int] = set()
+        for i, cell in enumerate(cells):
+            if cell != WALL and i not in self.boxes and i not in covered:
+                region = self._region(self.boxes, i)
+                covered |= region
+                visited.add((self.boxes, min(region)))
+                stack.append((self.boxes, region))
+        if all(self.goals[box] for box in self.boxes):
+            return False
+
+        while stack:
+            boxes, region = stack.pop()
+            if len(visited) > SUB_SEARCH_LIMIT:
+                return False
+
+            for box in boxes:
+                for offset in self.offsets:
+                    target = box + offset
+                    if box - offset not in region or cells[target] == WALL or target in boxes:
+                        continue
+                    if cells[target] == OUTSIDE:
+                        new_boxes = boxes - {box}
+                    else:
+                        new_boxes = (boxes - {box}) | {target}
+                    if all(self.goals[b] for b in new_boxes):
+                        return False
+                    new_region = self._region(new_boxes, box)
+                    key = (new_boxes, min(new_region))
+                    if key not in visited:
+                        visited.add(key)
+                        stack.append((new_boxes, new_region))
+        return True
+
+    def pattern(self) -> Pattern:
+        """
+        Returns the window as a pattern of offsets relative to the first cluster box.
+        """
+        ax, ay = self.anchor % self.board.width - self.x0 + 1, self.anchor // self.board.width - self.y0 + 1
+        boxes, walls, non_goals = set(), set(), set()
+        for i, cell in enumerate(self.cells):
+            lx, ly = i % self.width, i // self.width
+            if not (0 <= self.x0 - 1 + lx < self.board.width and 0 <= self.y0 - 1 + ly < self.board.height):
+                # Beyond the padded border: unreachable, so not part of the pattern
+                continue
+            offset = (lx - ax, ly - ay)
+            if cell == WALL:
+                walls.add(offset)
+            elif cell == FLOOR and not self.goals[i]:
+                non_goals.add(offset)
+            if i in self.boxes:
+                boxes.add(offset)
+        return frozenset(boxes), frozenset(walls), frozenset(non_goals)
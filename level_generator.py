@@ -0,0 +1,267 @@
+import argparse
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+from level_manager import LevelManager
+
+# Letters for the forward moves, indexed like OFFSET_STEPS
+LETTERS = ['L', 'R', 'U', 'D']
+
+
+class LevelSpec(NamedTuple):
+    """
+    Parameters of one generated level.
+
+    A generated level always comes from exactly `pulls` pulls with every box pulled
+    at least once, so its bundled solution has exactly `pulls` pushes (not
+    necessarily the fewest). `pulls` must be at least `boxes`.
+    """
+    width: int
+    height: int
+    boxes: int
+    wall_density: float
+    seed: int
+    pulls: Optional[int] = None   # Reverse pulls to make; defaults to 10 per box
+
+
+class LevelGenerator:
+    """
+    Generates solvable levels by playing Sokoban backwards.
+
+    Boxes start on their goals and the player pulls them away. Every pull undone
+    in reverse order is a legal push, so the reversed play is a solution and the
+    level is solvable by construction. The same spec always gives the same level.
+    """
+
+    def __init__(self, spec: LevelSpec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.width = spec.width
+        self.height = spec.height
+        self.steps = [-1, 1, -self.width, self.width]
+
+    def generate(self, max_attempts: int = 100) -> Tuple[List[str], str]:
+        """
+        Returns the level rows and a LURD solution for them.
+
+        An attempt fails when the player runs out of pulls early or some box was never
+        pulled; failed attempts are retried on a fresh board, up to `max_attempts`.
+        """
+        pulls = self.spec.pulls if self.spec.pulls is not None else 10 * self.spec.boxes
+        if pulls < self.spec.boxes:
+            raise ValueError(f"{self.spec} needs at least one pull per box")
+        for _ in range(max_attempts):
+            floor = self._carve()
+            if len(floor) < self.spec.boxes + 2:
+                continue
+            result = self._pull_boxes(floor)
+            if result is not None:
+                return result
+        raise ValueError(f"Could not generate a level for {self.spec}")
+
+    def _carve(self) -> List[int]:
+        """
+        Places random interior walls and returns the largest connected area of floor.
+        """
+        w, h = self.width, self.height
+        self.walls = bytearray([1]) * (w * h)
+        for y in range(1, h - 1):
+            for x in range(1, w - 1):
+                if self.rng.random() >= self.spec.wall_density:
+                    self.walls[y * w + x] = 0
+
+        best: List[int] = []
+        seen = set()
+        for start in range(w * h):
+            if self.walls[start] or start in seen:
+                continue
+            area = self._region(start, set())
+            seen |= area
+            if len(area) > len(best):
+                best = sorted(area)
+
+        # Wall off everything outside the chosen area
+        chosen = set(best)
+        for i in range(w * h):
+            if i not in chosen:
+                self.walls[i] = 1
+        return best
+
+    def _region(self, start: int, boxes) -> set:
+        region = {start}
+        stack = [start]
+        while stack:
+            current = stack.pop()
+            for step in self.steps:
+                neighbour = current + step
+                if not self.walls[neighbour] and neighbour not in boxes and neighbour not in region:
+                    region.add(neighbour)
+                    stack.append(neighbour)
+        return region
+
+    def _walk(self, start: int, target: int, boxes) -> List[int]:
+        """
+        Returns the step indices of a shortest walk from `start` to `target`.
+        """
+        parents = {start: None}
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                break
+            for k, step in enumerate(self.steps):
+                neighbour = current + step
+                if not self.walls[neighbour] and neighbour not in boxes and neighbour not in parents:
+                    parents[neighbour] = (current, k)
+                    queue.append(neighbour)
+
+        path = []
+        while parents[target] is not None:
+            target, k = parents[target]
+            path.append(k)
+        path.reverse()
+        return path
+
+    def _pull_candidates(self, player: int, boxes) -> List[Tuple[int, int]]:
+        """
+        Returns every (box, step index) pull the player can walk to and make.
+
+        A pull: the player stands next to a box and steps away from it, dragging it along.
+        """
+        region = self._region(player, boxes)
+        candidates = []
+        for box in sorted(boxes):
+            for k, step in enumerate(self.steps):
+                stand = box - step
+                behind = stand - step
+                if stand in region and not self.walls[behind] and behind not in boxes:
+                    candidates.append((box, k))
+        return candidates
+
+    def _pull_boxes(self, floor: List[int]) -> Optional[Tuple[List[str], str]]:
+        """
+        Makes exactly `pulls` pulls, moving every box at least once, or returns None
+        so the caller retries with a fresh board.
+        """
+        rng = self.rng
+        goals = set(rng.sample(floor, self.spec.boxes))
+        # Box identities by position, to know which boxes have been moved
+        boxes = {goal: n for n, goal in enumerate(sorted(goals))}
+        displaced = set()
+        free = [i for i in floor if i not in boxes]
+        player = rng.choice(free)
+
+        # Forward moves, collected backwards: walking with step k is undone by the opposite step
+        reverse_moves: List[str] = []
+        opposite = [1, 0, 3, 2]
+
+        pulls = self.spec.pulls if self.spec.pulls is not None else 10 * self.spec.boxes
+        candidates = self._pull_candidates(player, boxes)
+        for remaining in range(pulls, 0, -1):
+            # Favour boxes that have not moved yet, so every box ends up displaced
+            fresh = [candidate for candidate in candidates if boxes[candidate[0]] not in displaced]
+            options = fresh if fresh and rng.random() < 0.5 else list(candidates)
+            rng.shuffle(options)
+            if options is fresh:
+                options += [candidate for candidate in candidates if candidate not in fresh]
+
+            # Take the first pull that still leaves the player a pull afterwards
+            chosen = None
+            for box, k in options:
+                stand = box - self.steps[k]
+                after = dict(boxes)
+                after[stand] = after.pop(box)
+                next_candidates = self._pull_candidates(stand - self.steps[k], after)
+                if next_candidates or remaining == 1:
+                    chosen = (box, k, after, next_candidates)
+                    break
+            if chosen is None:
+                return None
+
+            box, k, after, candidates = chosen
+            step = self.steps[k]
+            stand = box - step
+            for walk_step in self._walk(player, stand, boxes):
+                reverse_moves.append(LETTERS[opposite[walk_step]].lower())
+                player += self.steps[walk_step]
+            boxes = after
+            player = stand - step
+            reverse_moves.append(LETTERS[k])
+            displaced.add(boxes[stand])
+
+        if len(displaced) < self.spec.boxes:
+            return None
+
+        # Finish with the player somewhere random in its area
+        end = rng.choice(sorted(self._region(player, boxes)))
+        for walk_step in self._walk(player, end, boxes):
+            reverse_moves.append(LETTERS[opposite[walk_step]].lower())
+            player += self.steps[walk_step]
+
+        rows = []
+        for y in range(self.height):
+            row = []
+            for x in range(self.width):
+                i = y * self.width + x
+                if self.walls[i]:
+                    row.append('#')
+                elif i in boxes:
+                    row.append('*' if i in goals else '$')
+                elif i == player:
+                    row.append('+' if i in goals else '@')
+                else:
+                    row.append('.' if i in goals else ' ')
+            rows.append(''.join(row))
+        # The walk to the first pull would trail after the last push, when the level is already solved
+        return rows, ''.join(reversed(reverse_moves)).rstrip('lurd')
+
+
+def _generate(spec: LevelSpec) -> Tuple[List[str], str]:
+    return LevelGenerator(spec).generate()
+
+
+def generate_levels(specs: List[LevelSpec], processes: Optional[int] = None) -> List[Tuple[List[str], str]]:
+    """
+    Generates one (rows, solution) pair per spec, in order, across a process pool.
+    """
+    if processes == 1 or len(specs) < 2:
+        return [_generate(spec) for spec in specs]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(_generate, specs, chunksize=max(1, len(specs) // 64)))
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    width, _, height = text.lower().partition('x')
+    return int(width), int(height or width)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate solvable Sokoban levels for stress tests.")
+    parser.add_argument("output", help="levels file to write, in the LevelManager format")
+    parser.add_argument("--solutions", help="also write the generated solutions to this file")
+    parser.add_argument("--size", nargs='+', type=parse_size, default=[(10, 10)], help="board sizes, e.g. 10x10 20x15")
+    parser.add_argument("--boxes", nargs='+', type=int, default=[3], help="box counts")
+    parser.add_argument("--wall-density", type=float, default=0.2, help="chance of an interior wall per cell")
+    parser.add_argument("--count", type=int, default=1, help="levels per size and box count")
+    parser.add_argument("--pulls", type=int, default=None, help="reverse pulls per level (default: 10 per box)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed; level i uses seed + i")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    specs = []
+    for width, height in args.size:
+        for boxes in args.boxes:
+            for _ in range(args.count):
+                specs.append(LevelSpec(width, height, boxes, args.wall_density, args.seed + len(specs), args.pulls))
+
+    start_time = time.time()
+    results = generate_levels(specs, processes=args.processes)
+    elapsed_time = time.time() - start_time
+
+    LevelManager.write_blocks(args.output, {n: rows for n, (rows, _) in enumerate(results, start=1)})
+    if args.solutions:
+        LevelManager.write_blocks(args.solutions, {n: [moves] for n, (_, moves) in enumerate(results, start=1)})
+    print(f"Generated {len(results)} levels in {elapsed_time:.2f}s")
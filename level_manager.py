@@ -27,3 +27,34 @@ class LevelManager:
             return self.load_level(level)
         
         return matrix
+
+    @staticmethod
+    def read_blocks(filename):
+        """
+        Parses a file made of "Level N" headers, each followed by lines up to a blank line.
+        """
+        blocks = {}
+        current = None
+        with open(filename, 'r') as file:
+            for line in file:
+                stripped = line.strip()
+                if stripped.startswith("Level ") and stripped[6:].isdigit():
+                    current = int(stripped[6:])
+                    blocks[current] = []
+                elif stripped == "":
+                    current = None
+                elif current is not None:
+                    blocks[current].append(stripped)
+        return blocks
+
+    @staticmethod
+    def write_blocks(filename, blocks):
+        """
+        Writes a dict of level number to lines in the same layout `read_blocks` parses.
+        """
+        with open(filename, 'w') as file:
+            for number, lines in sorted(blocks.items()):
+                file.write(f"Level {number}\n")
+                for line in lines:
+                    file.write(f"{line}\n")
+                file.write("\n")
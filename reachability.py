@@ -0,0 +1,183 @@
+from collections import deque
+from typing import List, Optional, Set, Tuple
+
+from board import Board, BOX, FLOOR, DIRECTIONS
+
+
+class PlayerReachability:
+    """
+    The region of cells the player can walk to for one box configuration.
+
+    The region is computed once with a flood fill; states reached by a single push
+    are derived with `after_push`, which repairs the parent's region locally instead
+    of flooding the whole board again. A derived region is kept as the parent's
+    region plus the few cells that changed, and only built as a set of its own the
+    first time `region` is read.
+    """
+
+    def __init__(self, board: Board, boxes, player: int, cells: Optional[bytearray] = None,
+                 region: Optional[Set[int]] = None):
+        self.board = board
+        self.boxes = frozenset(boxes)
+        self.player = player
+        self.cells = cells if cells is not None else board.occupancy(self.boxes)
+        self._region = region if region is not None else self._flood([player], set())
+        self._base = None
+        self.normalized_player = min(self._region)
+        # Cell the last push moved a box to when the region was repaired locally, else None
+        self.pushed_to = None
+
+    @property
+    def region(self) -> Set[int]:
+        if self._region is None:
+            base, removed, added = self._base
+            region = set(base)
+            region.discard(removed)
+            region |= added
+            self._region = region
+            self._base = None
+        return self._region
+
+    def in_region(self, cell: int) -> bool:
+        """
+        Checks whether the player can reach `cell`, without building a deferred region.
+        """
+        if self._region is not None:
+            return cell in self._region
+        base, removed, added = self._base
+        return cell in added or (cell != removed and cell in base)
+
+    def _flood(self, starts, region: Set[int]) -> Set[int]:
+        """
+        Grows `region` with every floor cell connected to `starts` and returns it.
+        """
+        cells = self.cells
+        offsets = self.board.neighbour_offsets
+        stack = [start for start in starts if cells[start] == FLOOR and start not in region]
+        region.update(stack)
+        while stack:
+            current = stack.pop()
+            for offset in offsets:
+                neighbour = current + offset
+                if cells[neighbour] == FLOOR and neighbour not in region:
+                    region.add(neighbour)
+                    stack.append(neighbour)
+        return region
+
+    def _may_split(self, cell: int) -> bool:
+        """
+        Checks whether blocking `cell` could disconnect its open neighbours.
+
+        The eight cells around `cell` are walked as a ring; if every open orthogonal
+        neighbour lies on the same run of open ring cells, they stay connected
+        around the blocked cell and the region cannot split.
+        """
+        cells = self.cells
+        ring = self.board.ring_offsets
+        is_open = [cells[cell + offset] == FLOOR for offset in ring]
+        if all(is_open):
+            return False
+
+        # Start the walk just after a closed cell so no run wraps around
+        start = is_open.index(False)
+        runs_with_orthogonal = 0
+        in_run = False
+        run_has_orthogonal = False
+        for step in range(1, len(ring) + 1):
+            k = (start + step) % len(ring)
+            if is_open[k]:
+                in_run = True
+                run_has_orthogonal = run_has_orthogonal or k % 2 == 0
+            elif in_run:
+                runs_with_orthogonal += run_has_orthogonal
+                in_run = False
+                run_has_orthogonal = False
+        return runs_with_orthogonal > 1
+
+    def reachable_pushes(self) -> List[Tuple[int, str]]:
+        """
+        Returns every (box, direction) push the player can walk to and perform.
+        """
+        cells = self.cells
+        region = self.region
+        offsets = self.board.offsets
+        pushes = []
+        for box in self.boxes:
+            for direction in DIRECTIONS:
+                offset = offsets[direction]
+                if box - offset in region and cells[box + offset] == FLOOR:
+                    pushes.append((box, direction))
+        return pushes
+
+    def after_push(self, box: int, direction: str) -> 'PlayerReachability':
+        """
+        Returns the reachability of the state after pushing `box` one cell in `direction`.
+        """
+        offset = self.board.offsets[direction]
+        target = box + offset
+        child = PlayerReachability.__new__(PlayerReachability)
+        child.board = self.board
+        child.boxes = (self.boxes - {box}) | {target}
+        child.player = box
+        child.cells = bytearray(self.cells)
+        child.cells[box] = FLOOR
+        child.cells[target] = BOX
+
+        parent_region = self.region
+        if target in parent_region and child._may_split(target):
+            # The new box may cut the region in two: flood only the player's side
+            child._region = child._flood([box], set())
+            child._base = None
+            child.normalized_player = min(child._region)
+            child.pushed_to = None
+            return child
+
+        # Only cells newly opened up by the vacated box square need visiting
+        added = {box}
+        cells = child.cells
+        neighbour_offsets = self.board.neighbour_offsets
+        stack = [box]
+        while stack:
+            current = stack.pop()
+            for n in neighbour_offsets:
+                neighbour = current + n
+                if cells[neighbour] == FLOOR and neighbour not in added and neighbour not in parent_region:
+                    added.add(neighbour)
+                    stack.append(neighbour)
+
+        child._region = None
+        child._base = (parent_region, target, added)
+        child.pushed_to = target
+        if self.normalized_player != target:
+            child.normalized_player = min(self.normalized_player, min(added))
+        else:
+            child.normalized_player = min(child.region)
+        return child
+
+    def path_to(self, target: int) -> Optional[List[str]]:
+        """
+        Returns the shortest list of direction letters walking the player to `target`.
+        """
+        if target == self.player:
+            return []
+        if target not in self.region:
+            return None
+
+        offsets = self.board.offsets
+        parents = {self.player: None}
+        queue = deque([self.player])
+        while queue:
+            current = queue.popleft()
+            for direction in DIRECTIONS:
+                neighbour = current + offsets[direction]
+                if neighbour in self.region and neighbour not in parents:
+                    parents[neighbour] = (current, direction)
+                    if neighbour == target:
+                        path = []
+                        while parents[neighbour] is not None:
+                            neighbour, step = parents[neighbour]
+                            path.append(step)
+                        path.reverse()
+                        return path
+                    queue.append(neighbour)
+        return None
@@ -1,202 +1,200 @@
-import copy
 from collections import deque
-from typing import List, Tuple, Set
-from game import Game
+from board import Board, DIRECTIONS
+from canonical import HashedVisitedSet, StateCanonicalizer
+from corral import CorralDetector
 from deadlock import DeadlockDetector
+from deadlock_patterns import DeadlockPatternDatabase
+from reachability import PlayerReachability
 import time
 import heapq
 
+# Move tuples in the (dx, dy, direction) format returned by the solvers
+MOVES = {direction: (dx, dy, direction) for direction, (dx, dy) in DIRECTIONS.items()}
+
 
 class Solver:
-    def __init__(self, initial_game):
+    """
+    Searches over pushes rather than single steps.
+
+    Each node is a box configuration plus the player's reachable region, and
+    states are deduplicated on canonical keys (normalized player cell and board
+    symmetries), so walking around inside one area never creates new states.
+    A node's history is kept as a chain of (parent, box, direction) records and
+    expanded into the full move list only when it is needed.
+
+    Pushes are also checked against a `DeadlockPatternDatabase`, which learns
+    dead box clusters during the search and is saved when the search ends.
+    When the player is shut out of an unsolved PI-corral, only pushes into that
+    corral are expanded, and corrals a bounded sub-search proves dead are dropped.
+    """
+
+    def __init__(self, initial_game, pattern_db=None):
         self.initial_game = initial_game
-        self.visited = set()
+        self.pattern_db = pattern_db if pattern_db is not None else DeadlockPatternDatabase()
+        self.board = Board(initial_game.get_matrix())
+        self.canonicalizer = StateCanonicalizer(self.board)
+        self.corrals = CorralDetector(self.board)
+        self.initial_reach = PlayerReachability(self.board, self.board.initial_boxes, self.board.initial_player)
+        self.visited = HashedVisitedSet()
         self.start_time = time.time()
 
-
-    from collections import deque
-
     def find_solution_bfs(self, callback=None):
-        queue = deque([(self.initial_game.get_matrix(), self.initial_game.worker(), [])])
-        self.visited = set()
-        worker_x, worker_y, _ = self.initial_game.worker()  # Unpack only what's needed
-        self.visited.add(self._serialize_state(self.initial_game.get_matrix(), worker_x, worker_y))
+        queue = deque([(self.initial_reach, None, None)])
+        self.visited = HashedVisitedSet()
+        self.visited.add(self._state_key(self.initial_reach))
 
         while queue:
-            current_matrix, (worker_x, worker_y, _), moves = queue.popleft()
+            reach, record, corral = queue.popleft()
 
             # Check if the current state is a solution
-            if self._is_solution(current_matrix):
-                print("Solution found:", moves)
-                return moves
+            if self._is_solution(reach):
+                return self._solution(record)
 
             # Call the callback function if provided
             if callback:
-                elapsed_time = time.time() - self.start_time
-                callback(current_matrix, moves, elapsed_time)
-
-            # Generate possible moves
-            possible_moves = [(-1, 0, 'L'), (1, 0, 'R'), (0, -1, 'U'), (0, 1, 'D')]
-            for dx, dy, direction in possible_moves:
-                new_game = Game(copy.deepcopy(current_matrix))
-                if new_game.can_move(dx, dy) or new_game.can_push(dx, dy):
-                    new_game.move(dx, dy, save=False)
-                    new_state = (new_game.get_matrix(), new_game.worker(), moves + [(dx, dy, direction)])
-                    
-                    # Serialize and check visited and deadlock before adding to the queue
-                    new_worker_x, new_worker_y, _ = new_game.worker()
-                    new_state_key = self._serialize_state(new_state[0], new_worker_x, new_worker_y)
-                    
-                    if new_state_key not in self.visited and not DeadlockDetector.is_deadlock(new_state[0]):
-                        self.visited.add(new_state_key)
-                        queue.append(new_state)
-
-        print("No solution found")
-        return []
+                self._report(callback, reach, record)
 
+            for child, child_record, child_corral in self._successors(reach, record, corral):
+                # Only queue states whose equivalence class has not been seen
+                if self.visited.add(self._state_key(child)):
+                    queue.append((child, child_record, child_corral))
 
+        return self._no_solution()
 
     def find_solution_dfs(self, callback=None):
-        stack = [(self.initial_game.get_matrix(), self.initial_game.worker(), [])]
-        self.visited = set()
+        # Each entry carries its canonical key, computed once when it is generated
+        stack = [(self.initial_reach, None, None, self._state_key(self.initial_reach))]
+        self.visited = HashedVisitedSet()
 
         while stack:
-            current_matrix, (worker_x, worker_y, _), moves = stack.pop()
-            state_key = self._serialize_state(current_matrix, worker_x, worker_y)
-
-            # If already visited, skip this state
-            if state_key in self.visited:
-                continue
+            reach, record, corral, state_key = stack.pop()
 
-            # Check if the current state is a deadlock
-            if DeadlockDetector.is_deadlock(current_matrix):
-                # If a deadlock is detected, skip without adding to visited
-                print("Deadlock detected, backtracking")
+            # If already visited, skip this state; otherwise mark it
+            if not self.visited.add(state_key):
                 continue
 
-            # Mark the current state as visited
-            self.visited.add(state_key)
-
             # Check if the current state is a solution
-            if self._is_solution(current_matrix):
-                print("Solution found:", moves)
-                return moves
+            if self._is_solution(reach):
+                return self._solution(record)
 
             # Call the callback function if provided (useful for visualizations or progress monitoring)
             if callback:
-                elapsed_time = time.time() - self.start_time
-                callback(current_matrix, moves, elapsed_time)
-
-            # Generate possible moves
-            possible_moves = [(-1, 0, 'L'), (1, 0, 'R'), (0, -1, 'U'), (0, 1, 'D')]
-
-            for dx, dy, direction in possible_moves:
-                # Create a new game instance based on the current state
-                new_game = Game(copy.deepcopy(current_matrix))
-
-                # Check if the worker can move or push in the given direction
-                if new_game.can_move(dx, dy) or new_game.can_push(dx, dy):
-                    new_game.move(dx, dy, save=False)
-                    new_state = (new_game.get_matrix(), new_game.worker(), moves + [(dx, dy, direction)])
-                    new_worker_x, new_worker_y, _ = new_game.worker()
-                    new_state_key = self._serialize_state(new_state[0], new_worker_x, new_worker_y)
-
-                    if new_state_key not in self.visited:
-                        stack.append(new_state)
-
-        print("No solution found")
-        return []
-
-
-
+                self._report(callback, reach, record)
 
+            for child, child_record, child_corral in self._successors(reach, record, corral):
+                child_key = self._state_key(child)
+                if child_key not in self.visited:
+                    stack.append((child, child_record, child_corral, child_key))
 
+        return self._no_solution()
 
     def find_solution_a_star(self, callback=None):
-    # Heuristic function to estimate distance from current state to goal
-        def heuristic(matrix):
-            if not hasattr(self, '_goal_positions'):
-                self._goal_positions = [(y, x) for y, row in enumerate(matrix) for x, cell in enumerate(row) if cell == '.']
-            box_positions = [(y, x) for y, row in enumerate(matrix) for x, cell in enumerate(row) if cell == '$']
+        goals = [self.board.coords(goal) for goal in self.board.goal_cells]
 
-            # Sum of minimum distances from each box to a goal
+        # Heuristic function to estimate distance from current state to goal
+        def heuristic(reach):
             distance_sum = 0
-            for box in box_positions:
-                distances = [abs(box[0] - goal[0]) + abs(box[1] - goal[1]) for goal in self._goal_positions]
+            goal_penalty = 0
+            for box in reach.boxes:
+                if self.board.goals[box]:
+                    continue
+                x, y = self.board.coords(box)
+                distances = [abs(x - gx) + abs(y - gy) for gx, gy in goals]
                 if distances:
                     distance_sum += min(distances)
+                # Penalty for each box not on a goal
+                goal_penalty += 1
+            return distance_sum + (2 * goal_penalty)
 
-            # Penalty for each box not on a goal
-            goal_penalty = len([box for box in box_positions if matrix[box[0]][box[1]] != '*'])
-
-            # Penalty for boxes near walls but not on goals
-            wall_penalty = 0
-            for box in box_positions:
-                y, x = box
-                if ((y == 0 or y == len(matrix) - 1) or (x == 0 or x == len(matrix[0]) - 1)) and matrix[y][x] != '*':
-                    wall_penalty += 10
-
-            return distance_sum + (2 * goal_penalty) + wall_penalty
-
-        # Priority queue for the open list, using heapq
+        # Priority queue for the open list; the counter breaks ties without comparing states
         open_list = []
-        initial_heuristic = heuristic(self.initial_game.get_matrix())
-        heapq.heappush(open_list, (initial_heuristic, 0, self.initial_game.get_matrix(), self.initial_game.worker(), []))
-        self.visited = set()
+        counter = 0
+        heapq.heappush(open_list, (heuristic(self.initial_reach), 0, counter, self.initial_reach, None, None))
+        self.visited = HashedVisitedSet()
 
         while open_list:
             # Pop the state with the lowest estimated cost
-            _, g, current_matrix, (worker_x, worker_y, _), moves = heapq.heappop(open_list)
-            state_key = self._serialize_state(current_matrix, worker_x, worker_y)
-
-            if state_key in self.visited:
-                continue
+            _, g, _, reach, record, corral = heapq.heappop(open_list)
 
-            # Use DeadlockDetector to check for deadlocks
-            if DeadlockDetector.is_deadlock(current_matrix):
-                print("Deadlock detected, skipping state")
+            if not self.visited.add(self._state_key(reach)):
                 continue
 
-            # Mark the current state as visited
-            self.visited.add(state_key)
-
             # Check if the current state is a solution
-            if self._is_solution(current_matrix):
-                print("Solution found:", moves)
-                return moves
+            if self._is_solution(reach):
+                return self._solution(record)
 
             # Call the callback function if provided
             if callback:
-                elapsed_time = time.time() - self.start_time
-                callback(current_matrix, moves, elapsed_time)
-
-            # Generate possible moves and add them to the priority queue
-            possible_moves = [(-1, 0, 'L'), (1, 0, 'R'), (0, -1, 'U'), (0, 1, 'D')]
-            for dx, dy, direction in possible_moves:
-                new_game = Game(copy.deepcopy(current_matrix))
-                if new_game.can_move(dx, dy) or new_game.can_push(dx, dy):
-                    new_game.move(dx, dy, save=False)
-                    new_matrix = new_game.get_matrix()
-
-                    # Skip deadlocked states
-                    if DeadlockDetector.is_deadlock(new_matrix):
-                        print("Move led to deadlock, skipping")
-                        continue
-
-                    h = heuristic(new_matrix)
-                    heapq.heappush(open_list, (g + 1 + h, g + 1, new_matrix, new_game.worker(), moves + [(dx, dy, direction)]))
-
+                self._report(callback, reach, record)
+
+            # Generate possible pushes and add them to the priority queue
+            for child, child_record, child_corral in self._successors(reach, record, corral):
+                counter += 1
+                heapq.heappush(open_list, (g + 1 + heuristic(child), g + 1, counter, child, child_record, child_corral))
+
+        return self._no_solution()
+
+    def _successors(self, reach, record, inherited):
+        # Every push the player can walk to, minus the ones that leave a dead box.
+        # Each child also gets this state's PI-corral, which it can often reuse.
+        corral = self.corrals.find_pi_corral(reach, inherited)
+        for box, direction in self._pushes(reach, corral):
+            target = box + self.board.offsets[direction]
+            if DeadlockDetector.is_corner_box(self.board, target):
+                continue
+            child = reach.after_push(box, direction)
+            if self.pattern_db.is_deadlock(self.board, child.cells, target):
+                continue
+            yield child, (record, box, direction), corral
+
+    def _pushes(self, reach, corral):
+        # Restrict to the pushes into an unsolved PI-corral, if there is one
+        if corral is None:
+            return reach.reachable_pushes()
+        if self.corrals.is_dead(reach, corral):
+            return []
+        return corral.pushes
+
+    def _state_key(self, reach):
+        return self.canonicalizer.key(reach)
+
+    def _push_chain(self, record):
+        # The (box, direction) pushes leading to a record, in order
+        pushes = []
+        while record is not None:
+            record, box, direction = record
+            pushes.append((box, direction))
+        pushes.reverse()
+        return pushes
+
+    def _moves(self, record):
+        # Replay the chain of pushes from the start, adding the walk before each push
+        moves = []
+        reach = self.initial_reach
+        for box, direction in self._push_chain(record):
+            walk = reach.path_to(box - self.board.offsets[direction])
+            moves.extend(MOVES[step] for step in walk)
+            moves.append(MOVES[direction])
+            reach = reach.after_push(box, direction)
+        return moves
+
+    def _solution(self, record):
+        self.pattern_db.save()
+        moves = self._moves(record)
+        print("Solution found:", moves)
+        return moves
+
+    def _no_solution(self):
+        self.pattern_db.save()
         print("No solution found")
         return []
 
-    def _serialize_state(self, matrix, worker_x, worker_y):
-        # Serialize the matrix and worker position to a string representation
-        return f"{worker_x},{worker_y}:" + ''.join(''.join(row) for row in matrix)
+    def _report(self, callback, reach, record):
+        # Only the pushes are reported; rebuilding the walks for every node is too slow
+        elapsed_time = time.time() - self.start_time
+        pushes = [MOVES[direction] for _, direction in self._push_chain(record)]
+        callback(self.board.to_matrix(reach.boxes, reach.player), pushes, elapsed_time)
 
-    def _is_solution(self, matrix):
+    def _is_solution(self, reach):
         # Check if all boxes are on goal positions
-        for row in matrix:
-            for cell in row:
-                if cell == '$' or cell == '.':
-                    return False
-        return True
+        return reach.boxes <= self.board.goal_cells
@@ -0,0 +1,150 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from board import Board, BOX, FLOOR, WALL
+from level_manager import LevelManager
+
+
+class ValidationResult(NamedTuple):
+    valid: bool                   # Every move was legal and the level ends solved
+    solved: bool                  # All boxes are on goals after the last legal move
+    moves: int                    # Number of legal moves replayed
+    pushes: int                   # Number of those moves that pushed a box
+    first_illegal: Optional[int]  # Index of the first illegal move (whitespace not counted), None if all were legal
+    reason: str                   # Short description of why the solution is not valid
+
+
+class SolutionValidator:
+    """
+    Headless replay of LURD move strings on a compact `Board`.
+
+    Lowercase and uppercase letters are both accepted; whitespace is ignored.
+    """
+
+    def __init__(self, level_matrix: List[str]):
+        self.board = Board(level_matrix)
+
+    def validate(self, moves: str) -> ValidationResult:
+        board = self.board
+        offsets = board.offsets
+        goals = board.goals
+        cells = board.occupancy(board.initial_boxes)
+        player = board.initial_player
+        # Solved once no goal is empty and no box is off a goal, as in `Game.is_completed`
+        empty_goals = sum(1 for goal in board.goal_cells if cells[goal] != BOX)
+        loose_boxes = sum(1 for box in board.initial_boxes if not goals[box])
+        pushes = 0
+        count = 0
+
+        for letter in moves:
+            offset = offsets.get(letter)
+            if offset is None:
+                if letter.isspace():
+                    continue
+                return ValidationResult(False, False, count, pushes, count, f"unknown move {letter!r}")
+
+            target = player + offset
+            content = cells[target]
+            if content == FLOOR:
+                player = target
+                count += 1
+                continue
+            if content == WALL:
+                return ValidationResult(False, empty_goals == loose_boxes == 0, count, pushes, count, "walked into a wall")
+
+            beyond = target + offset
+            if cells[beyond] != FLOOR:
+                return ValidationResult(False, empty_goals == loose_boxes == 0, count, pushes, count, "box is blocked")
+
+            cells[target] = FLOOR
+            cells[beyond] = BOX
+            delta = goals[target] - goals[beyond]
+            empty_goals += delta
+            loose_boxes += delta
+            player = target
+            pushes += 1
+            count += 1
+
+        if empty_goals or loose_boxes:
+            return ValidationResult(False, False, count, pushes, None, "level not solved")
+        return ValidationResult(True, True, count, pushes, None, "")
+
+
+# Validators built inside each worker process, keyed by level contents
+_validator_cache: Dict[Tuple[str, ...], SolutionValidator] = {}
+
+
+def _validate_job(job: Tuple[Tuple[str, ...], str]) -> ValidationResult:
+    level, moves = job
+    validator = _validator_cache.get(level)
+    if validator is None:
+        try:
+            validator = SolutionValidator(list(level))
+        except ValueError as e:
+            # A broken level fails its own pair instead of the whole batch
+            return ValidationResult(False, False, 0, 0, 0, f"invalid level: {e}")
+        _validator_cache[level] = validator
+    return validator.validate(moves)
+
+
+def validate_many(jobs: Iterable[Tuple[List[str], str]], processes: Optional[int] = None,
+                  chunksize: int = 256, parallel_threshold: int = 1000) -> List[ValidationResult]:
+    """
+    Validates (level_matrix, moves) pairs, in order.
+
+    Batches with at least `parallel_threshold` pairs are spread across a process
+    pool; smaller batches are cheaper to run in the current process.
+    """
+    jobs = [(tuple(''.join(row) for row in level), moves) for level, moves in jobs]
+    if len(jobs) < parallel_threshold or processes == 1:
+        return [_validate_job(job) for job in jobs]
+
+    # Keep jobs for the same level together so each worker builds few boards
+    order = sorted(range(len(jobs)), key=lambda i: jobs[i][0])
+    results: List[Optional[ValidationResult]] = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for i, result in zip(order, executor.map(_validate_job, [jobs[i] for i in order], chunksize=chunksize)):
+            results[i] = result
+    return results
+
+
+def load_solutions(levels_filename: str, solutions_filename: str) -> List[Tuple[int, List[str], str]]:
+    """
+    Pairs the levels in `levels_filename` with the move strings in `solutions_filename`.
+
+    The solutions file uses the same layout as the levels file: a "Level N" header
+    followed by one or more lines of LURD moves, ended by a blank line.
+    """
+    levels = LevelManager.read_blocks(levels_filename)
+    solutions = LevelManager.read_blocks(solutions_filename)
+    pairs = []
+    for number, lines in sorted(solutions.items()):
+        if number not in levels:
+            raise ValueError(f"Solution given for Level {number}, which is not in {levels_filename}")
+        pairs.append((number, levels[number], ''.join(lines)))
+    return pairs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate Sokoban solutions without the GUI.")
+    parser.add_argument("levels", help="levels file in the LevelManager format")
+    parser.add_argument("solutions", help="solutions file with a LURD string per level")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    pairs = load_solutions(args.levels, args.solutions)
+    start_time = time.time()
+    results = validate_many([(level, moves) for _, level, moves in pairs], processes=args.processes)
+    elapsed_time = time.time() - start_time
+
+    total_moves = 0
+    for (number, _, _), result in zip(pairs, results):
+        total_moves += result.moves
+        status = "OK" if result.valid else f"INVALID at move {result.first_illegal}: {result.reason}"
+        print(f"Level {number}: {status} ({result.moves} moves, {result.pushes} pushes)")
+
+    valid_count = sum(1 for result in results if result.valid)
+    rate = total_moves / elapsed_time if elapsed_time > 0 else float('inf')
+    print(f"{valid_count}/{len(results)} valid, {total_moves} moves in {elapsed_time:.2f}s ({rate:.0f} moves/s)")